@@ -1,12 +1,16 @@
 import asyncio
+import hashlib
 import logging
 import os
-import threading
+import secrets
+import signal
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from telegram import Update
-from telegram.ext import Application, CommandHandler, CallbackContext
+from telegram.error import BadRequest, Forbidden, RetryAfter
+from telegram.ext import AIORateLimiter, Application, CommandHandler, CallbackContext
 import random
-from flask import Flask
+from aiohttp import web
 
 # Enable logging
 logging.basicConfig(
@@ -16,7 +20,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # ==================== QUOTES DATABASE ====================
-QUOTES = [
+QUOTES = (
     "Time is the most valuable currency - spend it wisely.",
     "Don't watch the clock; do what it does. Keep going.",
     "The bad news is time flies. The good news is you're the pilot.",
@@ -47,69 +51,76 @@ QUOTES = [
     "You are braver than you believe, stronger than you seem, and smarter than you think.",
     "Every flower must grow through dirt.",
     "The most precious things in life are not things, but moments."
-]
+)
+
+# All 21 possible 20-cell bars, built once instead of on every update
+_BARS = tuple(("█" * i) + ("░" * (20 - i)) for i in range(21))
+
+# Second progress for each second 0-59, and its text with trailing zeros removed
+_SECOND_PROGRESS = tuple((s / 59) * 100 for s in range(60))
+_SECOND_PERCENTS = tuple(f"{p:.2f}".rstrip('0').rstrip('.') for p in _SECOND_PROGRESS)
 
 # ==================== INDIAN STANDARD TIME (IST) TIMEZONE ====================
 IST = timezone(timedelta(hours=5, minutes=30))
 
-def get_ist_now():
+# Month names for building dates without strftime
+_MONTH_FULL = ("January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December")
+_MONTH_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+def get_ist_now() -> datetime:
     """Get current time in Indian Standard Time (IST)"""
     return datetime.now(IST)
 
-def get_year_progress():
+@lru_cache(maxsize=4)
+def _year_bounds(year: int) -> tuple[datetime, float]:
+    """Year start in IST and the year's length in seconds (changes once a year)"""
+    year_start = datetime(year, 1, 1, 0, 0, 0, 0, tzinfo=IST)
+    year_end = datetime(year + 1, 1, 1, 0, 0, 0, 0, tzinfo=IST)
+    return year_start, (year_end - year_start).total_seconds()
+
+@lru_cache(maxsize=4)
+def _day_bounds(year: int, month: int, day: int) -> tuple[datetime, float]:
+    """Day start in IST and the day's length in seconds (changes once a day)"""
+    day_start = datetime(year, month, day, 0, 0, 0, 0, tzinfo=IST)
+    day_end = day_start + timedelta(days=1)
+    return day_start, (day_end - day_start).total_seconds()
+
+def get_year_progress(now: datetime) -> float:
     """Calculate year progress percentage using IST"""
-    now = get_ist_now()
-    
-    # Year start and end in IST
-    year_start = datetime(now.year, 1, 1, 0, 0, 0, 0, tzinfo=IST)
-    year_end = datetime(now.year + 1, 1, 1, 0, 0, 0, 0, tzinfo=IST)
-    
-    total_duration = year_end - year_start
-    elapsed_duration = now - year_start
-    
-    total_seconds = total_duration.total_seconds()
-    elapsed_seconds = elapsed_duration.total_seconds()
+    year_start, total_seconds = _year_bounds(now.year)
+    elapsed_seconds = (now - year_start).total_seconds()
     
     percentage = (elapsed_seconds / total_seconds) * 100
     return min(percentage, 100)
 
-def get_day_progress():
+def get_day_progress(now: datetime) -> float:
     """Calculate day progress percentage using IST"""
-    now = get_ist_now()
-    
-    # Day start and end in IST
-    day_start = datetime(now.year, now.month, now.day, 0, 0, 0, 0, tzinfo=IST)
-    day_end = day_start + timedelta(days=1)
-    
-    total_duration = day_end - day_start
-    elapsed_duration = now - day_start
-    
-    total_seconds = total_duration.total_seconds()
-    elapsed_seconds = elapsed_duration.total_seconds()
+    day_start, total_seconds = _day_bounds(now.year, now.month, now.day)
+    elapsed_seconds = (now - day_start).total_seconds()
     
     percentage = (elapsed_seconds / total_seconds) * 100
     return min(percentage, 100)
 
-def get_second_progress():
+def get_second_progress(now: datetime) -> float:
     """Calculate second progress within current minute using IST"""
-    now = get_ist_now()
-    seconds = now.second
-    percentage = (seconds / 59) * 100
-    return min(percentage, 100)
+    # datetime seconds never exceed 59, so this never goes past 100
+    return _SECOND_PROGRESS[now.second]
+
+@lru_cache(maxsize=2)
+def _next_month_start(year: int, month: int) -> datetime:
+    """Start of the month after the given one in IST (changes once a month)"""
+    if month == 12:
+        return datetime(year + 1, 1, 1, tzinfo=IST)
+    return datetime(year, month + 1, 1, tzinfo=IST)
 
-def get_month_info():
+def get_month_info(now: datetime) -> tuple[str, int, int]:
     """Get current month and days left using IST"""
-    now = get_ist_now()
-    month_name = now.strftime("%B")
-    
-    # Days in current month
-    if now.month == 12:
-        next_month = datetime(now.year + 1, 1, 1, tzinfo=IST)
-    else:
-        next_month = datetime(now.year, now.month + 1, 1, tzinfo=IST)
+    month_name = _MONTH_FULL[now.month - 1]
     
-    current_month_start = datetime(now.year, now.month, 1, tzinfo=IST)
-    days_in_month = (next_month - current_month_start).days
+    # Days left until the next month starts
+    next_month = _next_month_start(now.year, now.month)
     days_left = (next_month - now).days
     
     months_left = 12 - now.month
@@ -118,74 +129,40 @@ def get_month_info():
     
     return month_name, days_left, months_left
 
-def get_random_quote():
+def get_random_quote(now: datetime) -> str:
     """Get a random quote based on current minute using IST"""
-    now = get_ist_now()
     minute = now.minute
     quote_index = minute % len(QUOTES)
     return QUOTES[quote_index]
 
 # ==================== HELPER FUNCTIONS ====================
-def get_progress_bar(percentage, bar_length=20):
+def get_progress_bar(percentage: float, bar_length: int = 20) -> str:
     """Create simple progress bar"""
-    filled = int(round(bar_length * percentage / 100))
+    # Percentages are never negative, so adding 0.5 and truncating rounds to the
+    # nearest cell, with exact half cells rounding up (round() rounded them to even)
+    if bar_length == 20:
+        return _BARS[int(percentage * 0.2 + 0.5)]
+    
+    filled = int(bar_length * percentage / 100 + 0.5)
     empty = bar_length - filled
     bar = "█" * filled + "░" * empty
     return bar
 
-def format_12h_time(ist_time):
+def format_12h_time(ist_time: datetime) -> str:
     """Format time in 12-hour format with AM/PM"""
-    hour = ist_time.hour
-    minute = ist_time.minute
-    second = ist_time.second
-    
-    # Convert to 12-hour format
-    if hour == 0:
-        hour_12 = 12
-        period = "AM"
-    elif hour < 12:
-        hour_12 = hour
-        period = "AM"
-    elif hour == 12:
-        hour_12 = 12
-        period = "PM"
-    else:
-        hour_12 = hour - 12
-        period = "PM"
+    # 0 -> 12 AM, 1-11 -> AM, 12 -> 12 PM, 13-23 -> 1-11 PM
+    hour_12 = ((ist_time.hour - 1) % 12) + 1
+    period = "PM" if ist_time.hour >= 12 else "AM"
     
     # Format with leading zeros
-    return f"{hour_12:02d}:{minute:02d}:{second:02d} {period}"
+    return f"{hour_12:02d}:{ist_time.minute:02d}:{ist_time.second:02d} {period}"
 
 # ==================== MESSAGE GENERATOR ====================
-def generate_progress_message():
-    """Generate the complete progress message in exact format using IST"""
-    # Get all progress data using IST
-    year_progress = get_year_progress()
-    day_progress = get_day_progress()
-    second_progress = get_second_progress()
-    month_name, days_left, months_left = get_month_info()
-    quote = get_random_quote()
-    
-    now = get_ist_now()
-    
-    # Generate progress bars
-    year_bar = get_progress_bar(year_progress)
-    day_bar = get_progress_bar(day_progress)
-    second_bar = get_progress_bar(second_progress)
-    
-    # Format percentages (remove trailing zeros)
-    year_percent = f"{year_progress:.6f}".rstrip('0').rstrip('.')
-    day_percent = f"{day_progress:.6f}".rstrip('0').rstrip('.')
-    second_percent = f"{second_progress:.2f}".rstrip('0').rstrip('.')
-    
-    # Get time in 12-hour format
-    time_12h = format_12h_time(now)
-    
-    # Build message in exact format - PLAIN TEXT (no Markdown)
-    message = f"""⏰ LIVE TIME PROGRESS ⏰
+# Message layout in exact format, filled in by generate_progress_message
+_PROGRESS_TEMPLATE = """⏰ LIVE TIME PROGRESS ⏰
 ══════════════════════
 
-📅 YEAR {now.year} PROGRESS
+📅 YEAR {year} PROGRESS
 {year_bar}
 {year_percent}% completed
 
@@ -204,53 +181,195 @@ def generate_progress_message():
 └ Months Remaining: {months_left} months
 
 ⏰ CURRENT TIME (IST)
-├ Date: {now.strftime("%d %b %Y")}
+├ Date: {date}
 ├ Time: {time_12h}
-└ Second: {now.second}
+└ Second: {second}
 ══════════════════════
 💭 QUOTE OF THE MINUTE
 {quote}
 ══════════════════════
 🔄 Updates every 5 seconds 
 🤖 DevLoper :- @ravi_chad"""
+
+def generate_progress_message() -> str:
+    """Generate the complete progress message in exact format using IST"""
+    # Read the clock once so every section shows the same instant
+    now = get_ist_now()
+    
+    # Get all progress data using IST
+    year_progress = get_year_progress(now)
+    day_progress = get_day_progress(now)
+    second_progress = get_second_progress(now)
+    month_name, days_left, months_left = get_month_info(now)
+    quote = get_random_quote(now)
     
-    return message
+    # Generate progress bars
+    year_bar = get_progress_bar(year_progress)
+    day_bar = get_progress_bar(day_progress)
+    second_bar = get_progress_bar(second_progress)
+    
+    # Format percentages (remove trailing zeros)
+    year_percent = f"{year_progress:.6f}".rstrip('0').rstrip('.')
+    day_percent = f"{day_progress:.6f}".rstrip('0').rstrip('.')
+    second_percent = _SECOND_PERCENTS[now.second]
+    
+    # Get time in 12-hour format
+    time_12h = format_12h_time(now)
+    
+    # Fill the message template - PLAIN TEXT (no Markdown)
+    return _PROGRESS_TEMPLATE.format_map({
+        'year': now.year,
+        'year_bar': year_bar,
+        'year_percent': year_percent,
+        'day_bar': day_bar,
+        'day_percent': day_percent,
+        'second_bar': second_bar,
+        'second_percent': second_percent,
+        'month_name': month_name,
+        'days_left': days_left,
+        'months_left': months_left,
+        'date': f"{now.day:02d} {_MONTH_ABBR[now.month - 1]} {now.year}",
+        'time_12h': time_12h,
+        'second': now.second,
+        'quote': quote,
+    })
 
 # ==================== EDIT MESSAGE FUNCTION ====================
-async def update_message_continuously(chat_id: int, message_id: int, context: CallbackContext):
-    """Continuously edit the same message with updated progress"""
-    while context.chat_data.get(f'is_running_{chat_id}', False):
-        try:
-            # Generate new message
-            new_message = generate_progress_message()
-            
-            # Edit the existing message - PLAIN TEXT (no parse_mode)
-            await context.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=message_id,
-                text=new_message
-                # NO parse_mode parameter - using plain text
-            )
-            
-            # Wait for 5 seconds to avoid flood control
-            await asyncio.sleep(5)
-            
-        except Exception as e:
-            error_msg = str(e)
-            
-            # If message editing fails, stop the loop
-            if "message to edit not found" in error_msg or "Message can't be edited" in error_msg:
-                logger.info(f"Stopping updates for chat {chat_id}")
-                context.chat_data[f'is_running_{chat_id}'] = False
-                break
-            
-            # If flood control error, wait longer
-            if "Flood control" in error_msg or "429" in error_msg or "Too Many Requests" in error_msg:
-                logger.warning("Flood control detected, waiting 30 seconds")
-                await asyncio.sleep(30)
-            else:
-                logger.error(f"Error: {error_msg}")
-                await asyncio.sleep(10)
+# Live messages being updated: chat_id -> message_id
+_subscribers: dict[int, int] = {}
+# Last text shown in each live message, to skip edits that change nothing
+_last_text: dict[int, str] = {}
+# Chats backing off after an error: chat_id -> loop time to resume at
+_paused_until: dict[int, float] = {}
+# Consecutive failed edits per chat, for exponential backoff
+_error_attempts: dict[int, int] = {}
+# The single background task that updates every live message
+_ticker_task = None
+
+async def edit_progress_message(bot, chat_id: int, message_id: int, text: str):
+    """Edit one chat's live message, pausing or dropping that chat on errors"""
+    # Nothing changed since the last edit - skip the API call entirely
+    if _last_text.get(chat_id) == text:
+        return
+    
+    # Pacing and RetryAfter retries are handled by the application's AIORateLimiter
+    try:
+        # Edit the existing message - PLAIN TEXT (no parse_mode)
+        await bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=text
+            # NO parse_mode parameter - using plain text
+        )
+    except Exception as e:
+        # The chat may have run /stop or /progress while this edit was in flight;
+        # a failure for an old message must not touch the current subscription
+        if is_current_message(chat_id, message_id):
+            handle_edit_error(chat_id, text, e)
+        return
+    
+    if is_current_message(chat_id, message_id):
+        _last_text[chat_id] = text
+        _error_attempts.pop(chat_id, None)
+
+def is_current_message(chat_id: int, message_id: int) -> bool:
+    """Whether message_id is still the live message for the chat"""
+    return _subscribers.get(chat_id) == message_id
+
+def handle_edit_error(chat_id: int, text: str, error):
+    """Stop, skip or back off a chat after its live message failed to update"""
+    if isinstance(error, Forbidden):
+        # Bot was blocked or removed from the chat
+        logger.info(f"Stopping updates for chat {chat_id}: {error}")
+        unsubscribe(chat_id)
+        return
+    
+    if isinstance(error, BadRequest):
+        error_msg = str(error).lower()
+        
+        # Telegram refuses edits that don't change the text - not a real error
+        if "message is not modified" in error_msg:
+            _last_text[chat_id] = text
+            return
+        
+        # If the message is gone or no longer editable, stop updating this chat
+        if "message to edit not found" in error_msg or "message can't be edited" in error_msg:
+            logger.info(f"Stopping updates for chat {chat_id}")
+            unsubscribe(chat_id)
+            return
+    
+    back_off_chat(chat_id, error)
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Seconds to wait from a RetryAfter error (int or timedelta depending on PTB version)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return retry_after
+
+def back_off_chat(chat_id: int, error):
+    """Pause a chat after a failed edit, backing off exponentially with full jitter"""
+    # Capped at 60s, and randomised so chats recovering together don't retry in lockstep
+    attempt = min(_error_attempts.get(chat_id, 0) + 1, 6)
+    _error_attempts[chat_id] = attempt
+    delay = random.uniform(0, min(60, 2 ** attempt))
+    
+    # Flood control that outlasted the rate limiter's retries - never retry
+    # before Telegram says we may
+    if isinstance(error, RetryAfter):
+        delay = max(delay, retry_after_seconds(error) + 0.5)
+    logger.error(f"Error: {error} (retrying chat {chat_id} in {delay:.1f} seconds)")
+    _paused_until[chat_id] = asyncio.get_running_loop().time() + delay
+
+async def update_messages_continuously(bot):
+    """Generate the progress once per tick and edit every live message with it"""
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    while _subscribers:
+        next_tick += 5
+        
+        # Generate new message once for all chats
+        new_message = generate_progress_message()
+        
+        now = loop.time()
+        await asyncio.gather(*(
+            edit_progress_message(bot, chat_id, message_id, new_message)
+            for chat_id, message_id in list(_subscribers.items())
+            if _paused_until.get(chat_id, 0) <= now
+        ))
+        
+        # Wait until the next 5-second mark so edit latency doesn't add up as drift;
+        # if a tick overran, skip ahead instead of bursting to catch up
+        now = loop.time()
+        if next_tick < now:
+            next_tick = now
+        await asyncio.sleep(next_tick - now)
+
+def unsubscribe(chat_id: int):
+    """Stop live updates for a chat and forget its per-chat state"""
+    _subscribers.pop(chat_id, None)
+    _last_text.pop(chat_id, None)
+    _paused_until.pop(chat_id, None)
+    _error_attempts.pop(chat_id, None)
+
+def ensure_ticker_running(bot):
+    """Start the shared update task unless it is already running"""
+    global _ticker_task
+    if _ticker_task is None or _ticker_task.done():
+        _ticker_task = asyncio.create_task(update_messages_continuously(bot))
+
+async def stop_ticker():
+    """Cancel the shared update task and wait for it to finish"""
+    global _ticker_task
+    if _ticker_task is None:
+        return
+    
+    _ticker_task.cancel()
+    try:
+        await _ticker_task
+    except asyncio.CancelledError:
+        pass
+    _ticker_task = None
 
 # ==================== BOT HANDLERS ====================
 async def start(update: Update, context: CallbackContext):
@@ -277,7 +396,7 @@ async def progress(update: Update, context: CallbackContext):
     chat_id = update.effective_chat.id
     
     # Check if already running
-    if context.chat_data.get(f'is_running_{chat_id}', False):
+    if chat_id in _subscribers:
         await update.message.reply_text("⏳ Live progress is already running! Use /stop to end it.")
         return
     
@@ -285,18 +404,14 @@ async def progress(update: Update, context: CallbackContext):
     initial_msg = generate_progress_message()
     msg = await update.message.reply_text(initial_msg)
     
-    # Store message ID and set running flag
-    context.chat_data[f'last_msg_id_{chat_id}'] = msg.message_id
-    context.chat_data[f'is_running_{chat_id}'] = True
+    # Store message ID and subscribe the chat to live updates
+    context.chat_data['last_msg_id'] = msg.message_id
+    _subscribers[chat_id] = msg.message_id
+    _last_text[chat_id] = initial_msg
+    _paused_until.pop(chat_id, None)
     
-    # Start the continuous update loop
-    asyncio.create_task(
-        update_message_continuously(
-            chat_id, 
-            msg.message_id, 
-            context
-        )
-    )
+    # Start the shared update loop if this is the first live chat
+    ensure_ticker_running(context.bot)
     
     info_msg = """✅ Live Progress Started!
 
@@ -310,8 +425,8 @@ async def stop(update: Update, context: CallbackContext):
     """Stop the live progress updates"""
     chat_id = update.effective_chat.id
     
-    if context.chat_data.get(f'is_running_{chat_id}', False):
-        context.chat_data[f'is_running_{chat_id}'] = False
+    if chat_id in _subscribers:
+        unsubscribe(chat_id)
         await update.message.reply_text("⏹️ Live Progress Stopped\n\nUse /progress to start again!")
     else:
         await update.message.reply_text("ℹ️ No active live progress found.\nUse /progress to start one!")
@@ -346,29 +461,60 @@ Enjoy watching time progress! ⏳"""
     await update.message.reply_text(help_text)
 
 # ==================== WEB SERVER FOR RENDER ====================
-app = Flask(__name__)
-
-@app.route('/')
-def home():
-    return "🤖 Telegram Bot is running! ⏳"
-
-@app.route('/health')
-def health():
-    return "OK", 200
-
-def run_flask():
-    """Run Flask web server"""
+# Telegram posts updates here when running as a webhook on Render
+WEBHOOK_PATH = "/tg"
+
+async def home(request):
+    return web.Response(text="🤖 Telegram Bot is running! ⏳")
+
+async def health(request):
+    return web.Response(text="OK")
+
+def make_webhook_handler(application, secret_token):
+    """Build the route that hands incoming Telegram updates to the bot"""
+    async def telegram_webhook(request):
+        # Only Telegram knows the secret we registered with set_webhook
+        received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not secrets.compare_digest(received.encode(), secret_token.encode()):
+            return web.Response(status=403)
+        
+        update = Update.de_json(await request.json(), application.bot)
+        await application.update_queue.put(update)
+        return web.Response()
+    
+    return telegram_webhook
+
+async def start_web_server(webhook_handler=None):
+    """Start the aiohttp web server on the bot's event loop"""
+    app = web.Application()
+    app.router.add_get('/', home)
+    app.router.add_get('/health', health)
+    if webhook_handler is not None:
+        app.router.add_post(WEBHOOK_PATH, webhook_handler)
+    
+    runner = web.AppRunner(app)
+    await runner.setup()
     port = int(os.environ.get("PORT", 10000))
-    app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
+    await web.TCPSite(runner, '0.0.0.0', port).start()
+    print(f"🌐 Web server started on port {port}")
+    return runner
 
 # ==================== BOT RUN FUNCTION ====================
-def run_bot():
-    """Run the bot"""
+def build_application():
+    """Create the bot application with all command handlers"""
     # Get Token from Environment Variable
     TOKEN = os.environ.get("BOT_TOKEN", "YOUR_BOT_TOKEN")
     
-    # Create Application
-    application = Application.builder().token(TOKEN).build()
+    # Create Application - AIORateLimiter paces every outgoing request within
+    # Telegram's limits and retries automatically on flood control
+    rate_limiter = AIORateLimiter(
+        overall_max_rate=30,
+        overall_time_period=1,
+        group_max_rate=20,
+        group_time_period=60,
+        max_retries=3
+    )
+    application = Application.builder().token(TOKEN).rate_limiter(rate_limiter).build()
     
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
@@ -377,6 +523,31 @@ def run_bot():
     application.add_handler(CommandHandler("stats", stats))
     application.add_handler(CommandHandler("help", help_command))
     
+    return application
+
+async def run_bot():
+    """Run the web server and the bot together until the process is stopped"""
+    application = build_application()
+    
+    # Stop cleanly on Ctrl+C or when Render sends SIGTERM
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+    
+    # Use a webhook on the Render web port when the public hostname is known,
+    # otherwise fall back to polling (e.g. when running locally)
+    hostname = os.environ.get("RENDER_EXTERNAL_HOSTNAME")
+    if hostname:
+        # Derived from the bot token so overlapping instances during a deploy agree
+        secret_token = hashlib.sha256(application.bot.token.encode()).hexdigest()
+        runner = await start_web_server(make_webhook_handler(application, secret_token))
+    else:
+        runner = await start_web_server()
+    
     # Start the Bot
     print("🤖 Bot is starting...")
     print("⏳ Live Time Progress Bot")
@@ -386,18 +557,39 @@ def run_bot():
     print("🇮🇳 Using Indian Standard Time (IST) for ALL calculations")
     print("🕐 12-hour format with AM/PM")
     
-    application.run_polling(allowed_updates=Update.ALL_TYPES, drop_pending_updates=True)
+    try:
+        async with application:
+            await application.start()
+            if hostname:
+                await application.bot.set_webhook(
+                    url=f"https://{hostname}{WEBHOOK_PATH}",
+                    allowed_updates=Update.ALL_TYPES,
+                    # Keep the update that woke the service on a cold start or deploy
+                    drop_pending_updates=False,
+                    secret_token=secret_token
+                )
+                print(f"🔗 Webhook set to https://{hostname}{WEBHOOK_PATH}")
+            else:
+                await application.updater.start_polling(allowed_updates=Update.ALL_TYPES, drop_pending_updates=True)
+            
+            await stop_event.wait()
+            
+            # Stop live updates before the bot's HTTP client is shut down
+            await stop_ticker()
+            
+            if application.updater.running:
+                await application.updater.stop()
+            await application.stop()
+    finally:
+        await runner.cleanup()
 
 # ==================== MAIN FUNCTION ====================
 def main():
-    """Main function to run both Flask and bot"""
-    # Start Flask in a separate thread
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
-    print(f"🌐 Flask server started on port {os.environ.get('PORT', 10000)}")
-    
-    # Run bot in main thread
-    run_bot()
+    """Main function to run both the web server and bot on one event loop"""
+    try:
+        asyncio.run(run_bot())
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == '__main__':
     main()